@@ -1,26 +1,22 @@
 import os
-from scripts.data_loader import cargar_catalogo_sismico
-from scripts.data_cleaning import limpiar_datos
-from scripts.data_imputation import imputar_datos
+from scripts.data_checkpoint import procesar_incremental, total_eventos
 from scripts.data_visualizacion import graficar_datos
 
 # Ruta del archivo
 ruta_datos = os.path.join("data", "cat_origen_2012-jul2025.txt")
 
-# Cargar datos
-catalogo = cargar_catalogo_sismico(ruta_datos)
-print("Datos cargados:", catalogo.shape)
+# Cargar, limpiar e imputar solo las filas nuevas o modificadas desde el último checkpoint
+# (el catálogo completo queda particionado por mes en data/procesado)
+nuevos = procesar_incremental(ruta_datos)
+print("Filas nuevas o modificadas:", len(nuevos))
 
-# Ver nombres de columnas para identificar la columna de fecha
-print("Columnas disponibles:", catalogo.columns)
+print("Eventos en el catálogo procesado:", total_eventos())
 
-# Limpiar datos
-catalogo = limpiar_datos(catalogo)
-print("Datos limpiados:", catalogo.shape)
+# El catálogo completo está disponible con cargar_catalogo_procesado(), pero lee
+# todas las particiones (O(N)), por eso no se usa en la ejecución incremental
 
-# Imputar datos
-catalogo = imputar_datos(catalogo)
-print("Datos imputados:", catalogo.shape)
+# Ver nombres de columnas para identificar la columna de fecha
+print("Columnas disponibles:", nuevos.columns)
 
-# Mostrar muestra
-print(catalogo.head())
+# Mostrar muestra de las filas procesadas en esta ejecución
+print(nuevos.head())
@@ -1,6 +1,7 @@
 import pandas as pd
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, HTTPException, Query
 import pandas as pd
+from scripts.data_exposure import COLUMNA_MAGNITUD, cargar_ciudades, calcular_exposicion
 
 app = FastAPI(title="API Sísmica Ecuador", version="1.0")
 
@@ -22,6 +23,17 @@ df["fecha"] = pd.to_datetime(df["fecha"], errors="coerce")
 df["año"] = df["fecha"].dt.year
 df["magnitud"] = pd.to_numeric(df["magnitud"], errors="coerce")
 df["profundidad"] = pd.to_numeric(df["profundidad"], errors="coerce")
+df["lat"] = pd.to_numeric(df["lat"], errors="coerce")
+df["lon"] = pd.to_numeric(df["lon"], errors="coerce")
+df[COLUMNA_MAGNITUD] = pd.to_numeric(df[COLUMNA_MAGNITUD], errors="coerce")
+
+# --- EXPOSICIÓN (se calcula una sola vez al iniciar) ---
+# Se usa la misma magnitud que la columna de exposición de limpiar_datos
+# (COLUMNA_MAGNITUD), no "magnitud", para que la intensidad de un evento no dependa
+# de dónde se consulte
+ciudades = cargar_ciudades()
+impacto = calcular_exposicion(df["lat"], df["lon"], df["profundidad"], df[COLUMNA_MAGNITUD], ciudades=ciudades)
+impacto.index = df.index
 
 @app.get("/")
 def raiz():
@@ -57,4 +69,36 @@ def obtener_categorias(
     else:
         resumen = df["cat_prof"].value_counts().sort_index()
 
-    return {"grupo": group_by, "resumen": resumen.to_dict()}
\ No newline at end of file
+    return {"grupo": group_by, "resumen": resumen.to_dict()}
+
+@app.get("/sismos/impacto")
+def obtener_impacto(
+    mag_min: float = Query(3.5, description="Magnitud mínima"),
+    año: int = Query(None, description="Año específico (opcional)"),
+    ciudad: str = Query(None, description="Ciudad específica (opcional)")
+):
+    dff = df[df["magnitud"] >= mag_min]
+    if año:
+        dff = dff[dff["año"] == año]
+
+    resultado = pd.concat([dff[["fecha", "lat", "lon", "profundidad", "magnitud"]], impacto.loc[dff.index]], axis=1)
+
+    # Distancia e intensidad hacia la ciudad solicitada, junto a las de la ciudad más cercana
+    if ciudad:
+        seleccion = ciudades[ciudades["ciudad"].str.lower() == ciudad.lower()]
+        if seleccion.empty:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Ciudad no encontrada. Usa una de: {', '.join(ciudades['ciudad'])}."
+            )
+        expo = calcular_exposicion(dff["lat"], dff["lon"], dff["profundidad"], dff[COLUMNA_MAGNITUD], ciudades=seleccion)
+        expo.index = dff.index
+        resultado["ciudad"] = seleccion["ciudad"].iloc[0]
+        resultado["distancia_km"] = expo["distancia_ciudad_km"]
+        resultado["intensidad_ciudad"] = expo["intensidad_estimada"]
+
+    # Eventos sin profundidad conocida se devuelven con distancia, intensidad y
+    # población en null (None en JSON)
+    resultado["fecha"] = resultado["fecha"].astype(str)
+    resultado = resultado.astype(object).where(resultado.notna(), None)
+    return resultado.to_dict(orient="records")
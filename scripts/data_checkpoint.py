@@ -0,0 +1,424 @@
+import hashlib
+import io
+import json
+import os
+import zlib
+
+import pandas as pd
+from scripts.data_cleaning import limpiar_datos
+from scripts.data_imputation import imputar_datos
+
+# CONFIGURACIÓN DE RUTAS
+
+# ruta absoluta del script actual
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# carpeta con el checkpoint y el catálogo limpio particionado por mes
+DIR_PROCESADO = os.path.join(SCRIPT_DIR, "..", "data", "procesado")
+
+ARCHIVO_CHECKPOINT = "checkpoint.json"
+VERSION_CHECKPOINT = 2
+CARPETA_PARTICIONES = "particiones"
+CARPETA_INDICE = "indice"
+
+# tamaño aproximado de cada bloque de bytes con huella propia (cortado en fin de línea)
+BLOQUE_BYTES = 1024 * 1024
+
+# el índice evento -> mes se reparte en cubetas para leer y escribir solo las necesarias
+NUM_CUBETAS = 256
+
+# columnas cuyas medias acumuladas se usan en la imputación
+COLUMNAS_IMPUTACION = ['latitude_value', 'longitude_value', 'depth_value', 'magnitude_value_P']
+
+# columna interna de las particiones: bloques donde aparece el evento ("3;57")
+COLUMNA_OCURRENCIAS = '_ocurrencias'
+
+
+# FUNCIONES AUXILIARES
+
+def _huella_bytes(contenido):
+    return hashlib.sha256(contenido).hexdigest()
+
+
+def _leer_checkpoint(dir_salida):
+    ruta = os.path.join(dir_salida, ARCHIVO_CHECKPOINT)
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _guardar_checkpoint(dir_salida, checkpoint):
+    # El checkpoint se reemplaza completo o no se reemplaza
+    ruta = os.path.join(dir_salida, ARCHIVO_CHECKPOINT)
+    with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, ensure_ascii=False)
+    os.replace(ruta + ".tmp", ruta)
+
+
+def _escribir_csv(ruta, df):
+    if df.empty:
+        if os.path.exists(ruta):
+            os.remove(ruta)
+        return
+    df.to_csv(ruta + ".tmp", index=False)
+    os.replace(ruta + ".tmp", ruta)
+
+
+def _ruta_particion(dir_salida, mes):
+    return os.path.join(dir_salida, CARPETA_PARTICIONES, f"{mes}.csv")
+
+
+def _leer_particion(ruta):
+    particion = pd.read_csv(ruta, sep=",", dtype={'event': str, COLUMNA_OCURRENCIAS: str})
+    particion['time_value'] = pd.to_datetime(particion['time_value'], errors='coerce')
+    return particion
+
+
+def _escribir_particion(dir_salida, mes, particion):
+    _escribir_csv(_ruta_particion(dir_salida, mes), particion)
+
+
+def _estadisticas(particion):
+    estadisticas = {col: {"suma": float(particion[col].sum()), "conteo": int(particion[col].count())}
+                    for col in COLUMNAS_IMPUTACION}
+    estadisticas["filas"] = len(particion)
+    return estadisticas
+
+
+def _recalcular_estadisticas(dir_salida, checkpoint, meses):
+    # Estadísticas de cada mes tomadas del contenido actual de su partición
+    for mes in meses:
+        ruta = _ruta_particion(dir_salida, mes)
+        if os.path.exists(ruta):
+            checkpoint["estadisticas"][mes] = _estadisticas(_leer_particion(ruta))
+        else:
+            checkpoint["estadisticas"].pop(mes, None)
+
+
+def _cubeta(evento):
+    return zlib.crc32(str(evento).encode("utf-8")) % NUM_CUBETAS
+
+
+def _ruta_cubeta(dir_salida, cubeta):
+    return os.path.join(dir_salida, CARPETA_INDICE, f"{cubeta:03d}.csv")
+
+
+def _leer_cubeta(dir_salida, cubeta):
+    ruta = _ruta_cubeta(dir_salida, cubeta)
+    if not os.path.exists(ruta):
+        return {}
+    indice = pd.read_csv(ruta, sep=",", dtype=str)
+    return dict(zip(indice['event'], indice['mes']))
+
+
+def _buscar_meses(dir_salida, eventos):
+    # Mes de la partición de cada evento ya procesado, leyendo solo sus cubetas
+    por_cubeta = {}
+    for ev in eventos:
+        por_cubeta.setdefault(_cubeta(ev), []).append(ev)
+    meses = {}
+    for cubeta, lista in por_cubeta.items():
+        indice = _leer_cubeta(dir_salida, cubeta)
+        meses.update({ev: indice[ev] for ev in lista if ev in indice})
+    return meses
+
+
+def _actualizar_indice(dir_salida, cambios):
+    # cambios: evento -> mes nuevo, o None si el evento ya no está en el catálogo
+    por_cubeta = {}
+    for ev, mes in cambios.items():
+        por_cubeta.setdefault(_cubeta(ev), {})[ev] = mes
+    for cubeta, cambios_cubeta in por_cubeta.items():
+        indice = _leer_cubeta(dir_salida, cubeta)
+        for ev, mes in cambios_cubeta.items():
+            if mes is None:
+                indice.pop(ev, None)
+            else:
+                indice[ev] = mes
+        _escribir_csv(_ruta_cubeta(dir_salida, cubeta),
+                      pd.DataFrame({'event': list(indice), 'mes': list(indice.values())}))
+
+
+def _reiniciar(dir_salida):
+    # Primero se borra el checkpoint: si el proceso se interrumpe, la próxima
+    # ejecución vuelve a empezar desde cero en lugar de confiar en archivos borrados
+    ruta = os.path.join(dir_salida, ARCHIVO_CHECKPOINT)
+    if os.path.exists(ruta):
+        os.remove(ruta)
+    for carpeta in (CARPETA_PARTICIONES, CARPETA_INDICE):
+        for nombre in os.listdir(os.path.join(dir_salida, carpeta)):
+            os.remove(os.path.join(dir_salida, carpeta, nombre))
+
+
+def _leer_cabecera(archivo):
+    # Saltar los comentarios iniciales (cambian en cada exportación, por ejemplo la
+    # fecha de generación) y devolver dónde empiezan los datos y la fila de columnas
+    archivo.seek(0)
+    while True:
+        linea = archivo.readline()
+        if not linea or not linea.lstrip().startswith(b"#"):
+            break
+    return archivo.tell(), linea
+
+
+def _checkpoint_inicial(ruta_catalogo, cabecera):
+    return {
+        "version": VERSION_CHECKPOINT,
+        "ruta": os.path.abspath(ruta_catalogo),
+        "columnas": [c.strip() for c in cabecera.decode("utf-8").split(",")],
+        "huella_cabecera": _huella_bytes(cabecera.strip()),
+        # fin del último bloque, relativo al inicio de los datos
+        "offset": 0,
+        # [inicio, fin, huella, meses] de cada bloque; inicio y fin son relativos al
+        # inicio de los datos y meses son las particiones con filas leídas del bloque
+        "bloques": [],
+        # mes -> suma y conteo de las columnas imputadas y filas de esa partición
+        "estadisticas": {},
+        # meses que una ejecución interrumpida pudo dejar reescritos
+        "pendientes": [],
+    }
+
+
+def _checkpoint_valido(checkpoint, ruta_catalogo, cabecera):
+    if checkpoint.get("version") != VERSION_CHECKPOINT or checkpoint["ruta"] != os.path.abspath(ruta_catalogo):
+        return False
+    return _huella_bytes(cabecera.strip()) == checkpoint["huella_cabecera"]
+
+
+def _dividir_bloques(datos, inicio):
+    # Corta los datos (que terminan en fin de línea) en bloques de ~BLOQUE_BYTES
+    bloques = []
+    pos = 0
+    while pos < len(datos):
+        fin = datos.rfind(b"\n", pos, pos + BLOQUE_BYTES) + 1
+        if fin <= pos:
+            fin = datos.find(b"\n", pos) + 1
+        bloques.append([inicio + pos, inicio + fin, _huella_bytes(datos[pos:fin]), []])
+        pos = fin
+    return bloques
+
+
+def _leer_bloques(archivo, inicio_datos, bloques, indices, columnas):
+    partes = []
+    for i in indices:
+        inicio, fin = bloques[i][0], bloques[i][1]
+        archivo.seek(inicio_datos + inicio)
+        contenido = archivo.read(fin - inicio)
+        if contenido.strip():
+            parte = pd.read_csv(io.BytesIO(contenido), sep=",", comment="#", header=None, names=columnas)
+            parte['_bloque'] = i
+            partes.append(parte)
+    if not partes:
+        return limpiar_datos(pd.DataFrame(columns=columnas + ['_bloque']))
+    return limpiar_datos(pd.concat(partes, ignore_index=True))
+
+
+def _ocurrencias(texto):
+    return {int(b) for b in str(texto).split(";")}
+
+
+def medias_acumuladas(checkpoint):
+    suma = {col: 0.0 for col in COLUMNAS_IMPUTACION}
+    conteo = {col: 0 for col in COLUMNAS_IMPUTACION}
+    for est in checkpoint["estadisticas"].values():
+        for col in COLUMNAS_IMPUTACION:
+            suma[col] += est[col]["suma"]
+            conteo[col] += est[col]["conteo"]
+    return {col: (suma[col] / conteo[col] if conteo[col] else float("nan")) for col in COLUMNAS_IMPUTACION}
+
+
+# FUNCIONES PRINCIPALES
+
+def procesar_incremental(ruta_catalogo, dir_salida=DIR_PROCESADO, forzar=False):
+    # Procesa solo los bloques del catálogo que son nuevos o cuya huella cambió y
+    # reescribe únicamente las particiones mensuales afectadas. Un bloque modificado
+    # sin cambiar de tamaño se relee solo; si el cambio desplaza los bloques siguientes
+    # se relee desde ahí hasta el final. Si cambia la fila de columnas (o forzar=True)
+    # se reprocesa todo. Devuelve las filas nuevas o cambiadas, limpias e imputadas.
+    #
+    # Cada fila de una partición guarda los bloques donde aparece su evento. La versión
+    # vigente es la del bloque más alto; si esa versión desaparece (por ejemplo, se quita
+    # una corrección agregada) se relee el bloque de la ocurrencia anterior.
+    #
+    # Antes de escribir se registran en el checkpoint los meses a reescribir. Si el
+    # proceso se interrumpe, la siguiente ejecución recalcula sus estadísticas desde las
+    # particiones y repite el trabajo: quitar y volver a agregar eventos es idempotente.
+    for carpeta in (CARPETA_PARTICIONES, CARPETA_INDICE):
+        os.makedirs(os.path.join(dir_salida, carpeta), exist_ok=True)
+
+    with open(ruta_catalogo, "rb") as archivo:
+        inicio_datos, cabecera = _leer_cabecera(archivo)
+        tamano = os.path.getsize(ruta_catalogo) - inicio_datos
+
+        checkpoint = None if forzar else _leer_checkpoint(dir_salida)
+        if checkpoint is not None and not _checkpoint_valido(checkpoint, ruta_catalogo, cabecera):
+            print(" Cambió el archivo o su fila de columnas, se reprocesa completo.")
+            checkpoint = None
+        if checkpoint is None:
+            _reiniciar(dir_salida)
+            checkpoint = _checkpoint_inicial(ruta_catalogo, cabecera)
+        elif checkpoint["pendientes"]:
+            _recalcular_estadisticas(dir_salida, checkpoint, checkpoint["pendientes"])
+
+        # Comparar la huella de cada bloque ya procesado
+        previos = checkpoint["bloques"]
+        cambiados = []
+        for i, (inicio, fin, huella, _) in enumerate(previos):
+            archivo.seek(inicio_datos + inicio)
+            if fin > tamano or _huella_bytes(archivo.read(fin - inicio)) != huella:
+                cambiados.append(i)
+        # Si también cambió el bloque siguiente (o es el último) el contenido se desplazó
+        cambiados_set = set(cambiados)
+        corte = next((i for i in cambiados if i == len(previos) - 1 or i + 1 in cambiados_set), len(previos))
+        aislados = [i for i in cambiados if i < corte]
+
+        # Leer desde el corte hasta la última línea completa
+        inicio_cola = previos[corte][0] if corte < len(previos) else checkpoint["offset"]
+        archivo.seek(inicio_datos + inicio_cola)
+        cola = archivo.read(tamano - inicio_cola)
+        cola = cola[:cola.rfind(b"\n") + 1]
+        bloques = [list(b) for b in previos[:corte]] + _dividir_bloques(cola, inicio_cola)
+        for i in aislados:
+            archivo.seek(inicio_datos + bloques[i][0])
+            bloques[i][2] = _huella_bytes(archivo.read(bloques[i][1] - bloques[i][0]))
+
+        # Bloques anteriores al corte que se releen (modificados o requeridos)
+        releidos = set(aislados)
+
+        def releido(bloque):
+            return bloque in releidos or bloque >= corte
+
+        leidos = set()
+        partes = []
+        particiones = {}
+        meses_eventos = {}
+        while True:
+            por_leer = sorted((releidos | set(range(corte, len(bloques)))) - leidos)
+            partes.append(_leer_bloques(archivo, inicio_datos, bloques, por_leer, checkpoint["columnas"]))
+            leidos.update(por_leer)
+            filas = pd.concat(partes, ignore_index=True).sort_values('_bloque', kind='stable')
+            nuevas = filas.groupby('event')['_bloque'].agg(set).to_dict() if len(filas) else {}
+
+            # Particiones con eventos de bloques releídos o con versiones previas de eventos leídos
+            meses_eventos.update(_buscar_meses(dir_salida, set(nuevas) - set(meses_eventos)))
+            meses = set(meses_eventos.values()) | set(filas['time_value'].dt.strftime('%Y-%m'))
+            for i, bloque in enumerate(previos):
+                if releido(i):
+                    meses.update(bloque[3])
+            for mes in meses - set(particiones):
+                ruta = _ruta_particion(dir_salida, mes)
+                if os.path.exists(ruta):
+                    particion = _leer_particion(ruta)
+                    particion['_previas'] = particion[COLUMNA_OCURRENCIAS].map(_ocurrencias)
+                    particiones[mes] = particion
+
+            # Decidir la versión vigente de cada evento afectado
+            decision = {}
+            faltan = set()
+            for mes, particion in particiones.items():
+                for ev, previas in zip(particion['event'], particion['_previas']):
+                    if ev not in nuevas and not any(releido(b) for b in previas):
+                        continue
+                    finales = {b for b in previas if not releido(b)} | nuevas.get(ev, set())
+                    if not finales:
+                        decision[ev] = (None, finales)
+                    elif max(finales) in leidos:
+                        decision[ev] = ('nueva', finales)
+                    elif max(finales) == max(previas):
+                        decision[ev] = ('previa', finales)
+                    else:
+                        faltan.add(max(finales))
+            for ev, bloques_ev in nuevas.items():
+                decision.setdefault(ev, ('nueva', bloques_ev))
+
+            if not faltan:
+                break
+            releidos |= faltan
+
+        nombre_archivo = os.path.basename(ruta_catalogo)
+        print(f"\nProcesando {nombre_archivo}: {len(leidos)} bloques leídos de {len(bloques)}")
+
+    # Filas vigentes leídas en esta ejecución (la del bloque más alto de cada evento)
+    filas = filas.drop_duplicates(subset='event', keep='last')
+    filas = filas[filas['event'].map(lambda ev: decision[ev][0] == 'nueva').astype(bool)].copy()
+    filas[COLUMNA_OCURRENCIAS] = filas['event'].map(lambda ev: ";".join(map(str, sorted(decision[ev][1]))))
+    filas['mes'] = filas['time_value'].dt.strftime('%Y-%m')
+    print(f"Filas nuevas o modificadas: {len(filas)}")
+
+    # Nuevo contenido de cada partición afectada
+    grupos = {mes: grupo.drop(columns=['mes', '_bloque']) for mes, grupo in filas.groupby('mes')}
+    afectados = sorted(set(particiones) | set(grupos))
+    contenido = {}
+    for mes in afectados:
+        partes_mes = []
+        if mes in particiones:
+            particion = particiones[mes]
+            estado = particion['event'].map(lambda ev: decision.get(ev, ('sin cambio',))[0])
+            conservar = particion[estado.isin(['sin cambio', 'previa'])].copy()
+            previas = conservar['event'].map(lambda ev: decision.get(ev, (None, None))[1])
+            actualizadas = previas.notna()
+            conservar.loc[actualizadas, COLUMNA_OCURRENCIAS] = previas[actualizadas].map(
+                lambda b: ";".join(map(str, sorted(b))))
+            partes_mes.append(conservar.drop(columns='_previas'))
+        if mes in grupos:
+            partes_mes.append(grupos[mes])
+        contenido[mes] = pd.concat(partes_mes, ignore_index=True).sort_values('time_value', kind='stable')
+
+    # Registrar los meses a reescribir antes de tocar las particiones
+    checkpoint["pendientes"] = afectados
+    _guardar_checkpoint(dir_salida, checkpoint)
+
+    for i, bloque in enumerate(bloques):
+        if releido(i) or i >= len(previos):
+            bloque[3] = []
+    for mes in afectados:
+        _escribir_particion(dir_salida, mes, contenido[mes])
+        for texto in contenido[mes][COLUMNA_OCURRENCIAS]:
+            for b in _ocurrencias(texto):
+                if mes not in bloques[b][3]:
+                    bloques[b][3].append(mes)
+    print(f"Particiones reescritas: {len(afectados)}")
+
+    cambios = {ev: None for ev, (accion, _) in decision.items() if accion is None}
+    cambios.update(zip(filas['event'], filas['mes']))
+    _actualizar_indice(dir_salida, cambios)
+
+    for mes in afectados:
+        if contenido[mes].empty:
+            checkpoint["estadisticas"].pop(mes, None)
+        else:
+            checkpoint["estadisticas"][mes] = _estadisticas(contenido[mes])
+    checkpoint["bloques"] = bloques
+    checkpoint["offset"] = bloques[-1][1] if bloques else 0
+    checkpoint["pendientes"] = []
+    _guardar_checkpoint(dir_salida, checkpoint)
+
+    filas = filas.drop(columns=['mes', '_bloque', COLUMNA_OCURRENCIAS])
+    return imputar_datos(filas, medias=medias_acumuladas(checkpoint))
+
+
+def total_eventos(dir_salida=DIR_PROCESADO):
+    # Número de eventos del catálogo procesado, sin leer las particiones
+    checkpoint = _leer_checkpoint(dir_salida)
+    if checkpoint is None:
+        return 0
+    return sum(est["filas"] for est in checkpoint["estadisticas"].values())
+
+
+def cargar_catalogo_procesado(dir_salida=DIR_PROCESADO):
+    # Catálogo completo a partir de las particiones, imputado con las medias acumuladas.
+    # Lee todas las particiones (tiempo proporcional al catálogo completo).
+    checkpoint = _leer_checkpoint(dir_salida)
+    if checkpoint is None:
+        print(f" Error: no hay checkpoint en {dir_salida}. Ejecuta procesar_incremental primero.")
+        return None
+
+    carpeta = os.path.join(dir_salida, CARPETA_PARTICIONES)
+    particiones = [_leer_particion(os.path.join(carpeta, nombre))
+                   for nombre in sorted(os.listdir(carpeta)) if nombre.endswith(".csv")]
+    if particiones:
+        catalogo = pd.concat(particiones, ignore_index=True).drop(columns=COLUMNA_OCURRENCIAS)
+    else:
+        catalogo = limpiar_datos(pd.DataFrame(columns=checkpoint["columnas"]))
+    return imputar_datos(catalogo, medias=medias_acumuladas(checkpoint))
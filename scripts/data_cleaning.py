@@ -1,4 +1,5 @@
 import pandas as pd
+from scripts.data_exposure import agregar_exposicion
 
 
 def limpiar_datos(catalogo):
@@ -39,4 +40,7 @@ def limpiar_datos(catalogo):
             return 'Profundo'
     catalogo['categoria_profundidad'] = catalogo['depth_value'].apply(clasificar_profundidad)
 
+    # Exposición de las principales ciudades (distancia e intensidad estimada)
+    catalogo = agregar_exposicion(catalogo)
+
     return catalogo
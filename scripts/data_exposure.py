@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+import os
+
+# CONFIGURACIÓN DE RUTAS
+
+# ruta absoluta del script actual
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# tabla de ciudades incluida en el repositorio (no requiere conexión)
+CIUDADES_PATH = os.path.join(SCRIPT_DIR, "..", "data", "ciudades_ecuador.csv")
+
+# PARÁMETROS DEL CÁLCULO
+
+RADIO_TIERRA_KM = 6371.0
+
+# eventos procesados por bloque: la memoria queda acotada a TAMANO_BLOQUE x ciudades
+TAMANO_BLOQUE = 100_000
+
+# coeficientes de Bakun y Wentworth (1997): MMI = C0 + C1 M - C2 log10(R)
+ATENUACION_C0 = 3.67
+ATENUACION_C1 = 1.17
+ATENUACION_C2 = 3.19
+
+# magnitud usada en la relación de atenuación: la magnitud preferida del evento
+# (magnitude_value_P), la misma que limpiar_datos usa para filtrar y clasificar.
+# La API también la usa para que un evento tenga la misma intensidad en ambos lados.
+COLUMNA_MAGNITUD = 'magnitude_value_P'
+
+# intensidad (MMI) a partir de la cual el sismo se considera sentido en la ciudad
+UMBRAL_SENTIDO = 4.0
+
+
+# FUNCIONES
+
+def cargar_ciudades(path=CIUDADES_PATH):
+    ciudades = pd.read_csv(path, sep=",", comment="#")
+    ciudades.columns = ciudades.columns.str.strip()
+    return ciudades
+
+
+def intensidad_atenuacion(magnitud, distancia_km):
+    # R es la distancia hipocentral; se limita a 1 km para evitar log10(0)
+    intensidad = (ATENUACION_C0 + ATENUACION_C1 * magnitud
+                  - ATENUACION_C2 * np.log10(np.maximum(distancia_km, 1.0)))
+    return np.clip(intensidad, 1.0, 12.0)
+
+
+def calcular_exposicion(lat, lon, profundidad, magnitud, ciudades=None, tamano_bloque=TAMANO_BLOQUE):
+    if ciudades is None:
+        ciudades = cargar_ciudades()
+
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    # Con profundidad desconocida la distancia, intensidad y población quedan en NaN
+    profundidad = np.asarray(profundidad, dtype=float)
+    magnitud = np.asarray(magnitud, dtype=float)
+
+    lat_c = np.radians(ciudades['latitud'].to_numpy(dtype=float))
+    lon_c = np.radians(ciudades['longitud'].to_numpy(dtype=float))
+    poblacion = ciudades['poblacion'].to_numpy(dtype=float)
+    nombres = ciudades['ciudad'].to_numpy(dtype=object)
+
+    # Vectores unitarios de las ciudades (3 x ciudades)
+    vec_c = np.stack([np.cos(lat_c) * np.cos(lon_c), np.cos(lat_c) * np.sin(lon_c), np.sin(lat_c)])
+
+    n = len(lat)
+    indice_cercana = np.zeros(n, dtype=np.intp)
+    distancia_cercana = np.full(n, np.nan)
+    poblacion_expuesta = np.zeros(n)
+
+    # Radio hipocentral dentro del cual la intensidad alcanza UMBRAL_SENTIDO
+    radio_sentido = 10 ** ((ATENUACION_C0 + ATENUACION_C1 * magnitud - UMBRAL_SENTIDO) / ATENUACION_C2)
+    # Se pasa a término haversine: epicentral <= sqrt(radio^2 - z^2)
+    epicentral_sentido = np.sqrt(np.clip(radio_sentido ** 2 - profundidad ** 2, 0.0, None))
+    a_sentido = np.sin(np.minimum(epicentral_sentido / (2.0 * RADIO_TIERRA_KM), np.pi / 2)) ** 2
+    # Con R < 1 km la intensidad se evalúa en 1 km, por lo que un radio menor nunca se alcanza
+    a_sentido[(radio_sentido < 1.0) | (radio_sentido < profundidad)] = -1.0
+
+    # Matriz evento x ciudad calculada por bloques. El término haversine equivale a
+    # a = (1 - u_evento . u_ciudad) / 2, así que la matriz es un producto 3 x ciudades;
+    # arcsin y log10 solo se calculan para la ciudad más cercana.
+    for inicio in range(0, n, tamano_bloque):
+        fin = min(inicio + tamano_bloque, n)
+        lat_e = np.radians(lat[inicio:fin])
+        lon_e = np.radians(lon[inicio:fin])
+        vec_e = np.column_stack([np.cos(lat_e) * np.cos(lon_e), np.cos(lat_e) * np.sin(lon_e), np.sin(lat_e)])
+
+        a = (1.0 - vec_e @ vec_c) / 2.0
+
+        cercana = np.argmin(np.where(np.isnan(a), np.inf, a), axis=1)
+        indice_cercana[inicio:fin] = cercana
+
+        # Distancia epicentral (haversine) e hipocentral solo para la ciudad más cercana
+        a_cercana = (np.sin((lat_e - lat_c[cercana]) / 2.0) ** 2
+                     + np.cos(lat_e) * np.cos(lat_c[cercana]) * np.sin((lon_e - lon_c[cercana]) / 2.0) ** 2)
+        epicentral = 2.0 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(np.clip(a_cercana, 0.0, 1.0)))
+        distancia_cercana[inicio:fin] = np.hypot(epicentral, profundidad[inicio:fin])
+
+        poblacion_expuesta[inicio:fin] = (a <= a_sentido[inicio:fin, None]) @ poblacion
+
+    # La ciudad más cercana es también la de mayor intensidad (misma magnitud)
+    intensidad_max = intensidad_atenuacion(magnitud, distancia_cercana)
+
+    # La ciudad más cercana solo depende del epicentro; el resto requiere profundidad
+    ciudad_cercana = nombres[indice_cercana]
+    ciudad_cercana[np.isnan(lat) | np.isnan(lon)] = None
+    poblacion_expuesta = pd.array(poblacion_expuesta.astype(np.int64), dtype='Int64')
+    poblacion_expuesta[np.isnan(distancia_cercana)] = pd.NA
+
+    return pd.DataFrame({
+        'ciudad_cercana': ciudad_cercana,
+        'distancia_ciudad_km': distancia_cercana.round(2),
+        'intensidad_estimada': intensidad_max.round(1),
+        'poblacion_expuesta': poblacion_expuesta,
+    })
+
+
+def agregar_exposicion(catalogo, col_magnitud=COLUMNA_MAGNITUD, ciudades=None):
+    exposicion = calcular_exposicion(
+        catalogo['latitude_value'],
+        catalogo['longitude_value'],
+        catalogo['depth_value'],
+        catalogo[col_magnitud],
+        ciudades=ciudades,
+    )
+    exposicion.index = catalogo.index
+    for col in exposicion.columns:
+        catalogo[col] = exposicion[col]
+    return catalogo
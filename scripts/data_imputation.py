@@ -1,13 +1,15 @@
 import pandas as pd
 
-def imputar_datos(catalogo):
+def imputar_datos(catalogo, medias=None):
     # Quitar espacios de nombres de columnas por si acaso
     catalogo.columns = catalogo.columns.str.strip()
 
     # Imputar valores faltantes en columnas numéricas principales
+    # (si se reciben medias acumuladas, se usan en lugar de la media del DataFrame)
     for col in ['latitude_value', 'longitude_value', 'depth_value', 'magnitude_value_P']:
         if col in catalogo.columns:
-            catalogo[col] = catalogo[col].fillna(catalogo[col].mean())
+            media = medias[col] if medias is not None and col in medias else catalogo[col].mean()
+            catalogo[col] = catalogo[col].fillna(media)
         else:
             print(f" Columna {col} no encontrada, se omite imputación.")
 
@@ -0,0 +1,195 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+import scripts.data_checkpoint as checkpoint
+from scripts.data_checkpoint import procesar_incremental, cargar_catalogo_procesado
+from scripts.data_cleaning import limpiar_datos
+from scripts.data_imputation import imputar_datos
+
+# Comprueba que el procesamiento incremental produce el mismo catálogo que
+# cargar -> limpiar_datos -> imputar_datos sobre el archivo completo.
+# Uso: python -m scripts.verificar_incremental
+
+# CONFIGURACIÓN DE RUTAS
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(SCRIPT_DIR, "..", "data", "cat_origen_2012-jul2025.txt")
+
+# bloques pequeños para que el catálogo de prueba ocupe varios bloques
+BLOQUE_PRUEBA = 16 * 1024
+
+
+# FUNCIONES AUXILIARES
+
+def _referencia(ruta):
+    catalogo = pd.read_csv(ruta, sep=",", comment="#")
+    catalogo = limpiar_datos(catalogo)
+    # Una corrección agregada al final reemplaza a la versión anterior del evento
+    catalogo = catalogo.drop_duplicates(subset='event', keep='last')
+    return imputar_datos(catalogo)
+
+
+def _columnas_iguales(a, b):
+    # Las particiones CSV releen como número valores que en el texto original
+    # vienen con espacios (por ejemplo "    322.80"), así que cada valor se compara
+    # como número cuando ambos lo son y como texto en otro caso
+    texto_a = a.astype(object).astype(str).fillna('nan').str.strip()
+    texto_b = b.astype(object).astype(str).fillna('nan').str.strip()
+    numero_a = pd.to_numeric(texto_a, errors='coerce').to_numpy(dtype=float)
+    numero_b = pd.to_numeric(texto_b, errors='coerce').to_numpy(dtype=float)
+    numericos = ~np.isnan(numero_a) & ~np.isnan(numero_b)
+    iguales = np.where(numericos, np.isclose(numero_a, numero_b), texto_a.to_numpy() == texto_b.to_numpy())
+    faltantes = texto_a.str.lower().isin(['nan', '<na>', 'none']) & texto_b.str.lower().isin(['nan', '<na>', 'none'])
+    return bool((iguales | faltantes.to_numpy()).all())
+
+
+def _comparar(nombre, ruta, dir_salida):
+    esperado = _referencia(ruta).set_index('event').sort_index()
+    obtenido = cargar_catalogo_procesado(dir_salida).set_index('event').sort_index()
+
+    assert list(esperado.index) == list(obtenido.index), f"{nombre}: eventos distintos"
+    for col in esperado.columns:
+        if col == 'time_value':
+            iguales = (esperado[col].values == obtenido[col].values).all()
+        else:
+            iguales = _columnas_iguales(esperado[col], obtenido[col])
+        assert iguales, f"{nombre}: columna {col} distinta"
+    print(f" OK {nombre}: {len(obtenido)} eventos coinciden con el procesamiento completo")
+
+
+def _lineas(ruta):
+    with open(ruta, "rb") as f:
+        return f.read().split(b"\n")
+
+
+def _escribir(ruta, lineas):
+    with open(ruta, "wb") as f:
+        f.write(b"\n".join(lineas))
+
+
+def _cambiar_campo(linea, posicion, valor):
+    campos = linea.split(b",")
+    campos[posicion] = valor.rjust(len(campos[posicion]))
+    return b",".join(campos)
+
+
+def _posicion(lineas, columna):
+    cabecera = next(linea for linea in lineas if not linea.startswith(b"#"))
+    return [c.strip() for c in cabecera.split(b",")].index(columna)
+
+
+def _primera_fila(lineas):
+    return next(i for i, linea in enumerate(lineas) if not linea.startswith(b"#")) + 1
+
+
+# ESCENARIOS
+
+def verificar(directorio):
+    original = _lineas(DATA_PATH)
+    ruta = os.path.join(directorio, "catalogo.txt")
+    salida = os.path.join(directorio, "procesado")
+    fila = _primera_fila(original)
+    col_prof = _posicion(original, b"depth_value")
+    col_mag = _posicion(original, b"magnitude_value_P")
+    col_tiempo = _posicion(original, b"time_value")
+
+    # 1. Carga inicial con la última línea incompleta, luego se agrega el resto
+    lineas = list(original)
+    lineas[fila + 50] = _cambiar_campo(lineas[fila + 50], col_prof, b"NaN")
+    corte = fila + 2000
+    _escribir(ruta, lineas[:corte] + [lineas[corte][:40]])
+    procesar_incremental(ruta, salida)
+    _escribir(ruta, lineas[:corte])
+    _comparar("carga inicial con línea incompleta", ruta, salida)
+    _escribir(ruta, lineas)
+    nuevos = procesar_incremental(ruta, salida)
+    assert len(nuevos) == len(lineas) - 1 - corte, "filas nuevas inesperadas"
+    _comparar("filas agregadas", ruta, salida)
+
+    # 2. Sin datos nuevos: mismo esquema limpio, sin filas
+    completo = cargar_catalogo_procesado(salida)
+    nuevos = procesar_incremental(ruta, salida)
+    assert nuevos.empty and list(nuevos.columns) == list(completo.columns), "esquema sin datos nuevos"
+    print(" OK sin datos nuevos: esquema limpio y 0 filas")
+
+    # 3. Correcciones agregadas al final, una de ellas cambia de mes
+    correccion = _cambiar_campo(lineas[fila], col_tiempo, lineas[fila].split(b",")[col_tiempo].replace(b"2012", b"2013"))
+    otra = _cambiar_campo(lineas[fila + 10], col_mag, b"5.5")
+    lineas = lineas[:-1] + [correccion, otra, b""]
+    _escribir(ruta, lineas)
+    procesar_incremental(ruta, salida)
+    _comparar("correcciones agregadas", ruta, salida)
+
+    # 4. Ediciones del mismo largo antes del offset; el primer bloque también contiene
+    #    la versión anterior del evento corregido, que no debe volver a prevalecer
+    lineas[fila + 5] = _cambiar_campo(lineas[fila + 5], col_prof, b"NaN")
+    lineas[fila + 1000] = _cambiar_campo(lineas[fila + 1000], col_mag, b"9.9")
+    _escribir(ruta, lineas)
+    nuevos = procesar_incremental(ruta, salida)
+    assert len(nuevos) < 4 * BLOQUE_PRUEBA // 200, "se releyeron bloques sin cambios"
+    _comparar("edición del mismo largo", ruta, salida)
+
+    # 5. Edición que cambia el largo y borrado de una fila antes del offset
+    lineas[fila + 300] = lineas[fila + 300] + b"   "
+    del lineas[fila + 700]
+    _escribir(ruta, lineas)
+    procesar_incremental(ruta, salida)
+    _comparar("edición de largo distinto y fila borrada", ruta, salida)
+
+    # 6. Interrupción después de reescribir particiones y antes del checkpoint
+    base = lineas[:-1]
+    agregadas = [_cambiar_campo(linea, col_mag, b"3.0") for linea in original[fila + 1200:fila + 2200:100]]
+    _escribir(ruta, base + agregadas + [b""])
+    escribir_original = checkpoint._escribir_particion
+    escritas = []
+
+    def escribir_e_interrumpir(*args):
+        escribir_original(*args)
+        escritas.append(args[1])
+        if len(escritas) == 1:
+            raise RuntimeError("interrupción simulada")
+
+    checkpoint._escribir_particion = escribir_e_interrumpir
+    try:
+        procesar_incremental(ruta, salida)
+        raise AssertionError("la interrupción simulada no ocurrió")
+    except RuntimeError:
+        pass
+    finally:
+        checkpoint._escribir_particion = escribir_original
+    procesar_incremental(ruta, salida)
+    _comparar("reanudación tras interrupción", ruta, salida)
+
+    # 7. Nueva exportación: cambia la fecha de generación y se agrega un comentario
+    fecha = next(i for i, linea in enumerate(lineas) if linea.startswith("# Fecha de generación".encode("utf-8")))
+    lineas = base + agregadas + [b""]
+    lineas[fecha] = "# Fecha de generación: 2025-09-30 08:00:00".encode("utf-8")
+    lineas.insert(fecha + 1, "# Comentario agregado en la exportación".encode("utf-8"))
+    _escribir(ruta, lineas)
+    nuevos = procesar_incremental(ruta, salida)
+    assert nuevos.empty, "un cambio en los comentarios no debe reprocesar el catálogo"
+    _comparar("comentarios de cabecera modificados", ruta, salida)
+
+    # 8. Se agrega una corrección del primer evento y luego se retira: debe volver
+    #    a prevalecer la corrección anterior del escenario 3
+    sin_correccion = list(lineas)
+    lineas = lineas[:-1] + [_cambiar_campo(lineas[fila + 1], col_mag, b"6.1"), b""]
+    _escribir(ruta, lineas)
+    procesar_incremental(ruta, salida)
+    _comparar("corrección del primer evento", ruta, salida)
+    _escribir(ruta, sin_correccion)
+    procesar_incremental(ruta, salida)
+    _comparar("corrección retirada", ruta, salida)
+
+
+if __name__ == "__main__":
+    checkpoint.BLOQUE_BYTES = BLOQUE_PRUEBA
+    directorio = tempfile.mkdtemp()
+    try:
+        verificar(directorio)
+        print("\nVerificación del procesamiento incremental completada.")
+    finally:
+        shutil.rmtree(directorio)